@@ -2,16 +2,293 @@
 This class is responsible for storing all the info about the current state of a chess game. It will also be responsible for determining the valid moves at the current state. It will also keep a move log.
 """
 
+import random
+from array import array
+
+# piece codes: the low 3 bits are the piece type, bit 3 is set for black pieces, 0 is an empty square
+EMPTY = 0
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+WHITE, BLACK = 0, 8
+PIECE_NAMES = ("--", "wP", "wN", "wB", "wR", "wQ", "wK", "--",
+               "--", "bP", "bN", "bB", "bR", "bQ", "bK", "--")  # piece code -> piece name
+PIECE_CODES = {name: code for code, name in enumerate(PIECE_NAMES) if name != "--"}
+PIECE_CODES["--"] = EMPTY
+FULL_BB = (1 << 64) - 1  # all 64 squares, used to keep products and complements within 64 bits
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+NOT_FILE_A = ~FILE_A & FULL_BB  # complements kept as constants so the generators don't rebuild them on every call
+NOT_FILE_H = ~FILE_H & FULL_BB
+NOT_FILE_AB = ~(FILE_A | FILE_B) & FULL_BB
+NOT_FILE_GH = ~(FILE_G | FILE_H) & FULL_BB
+RANK_8 = 0xFF
+RANK_6 = RANK_8 << 16
+RANK_3 = RANK_8 << 40
+RANK_1 = RANK_8 << 56
+
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (1, -1), (-1, 1), (1, 1))
+
+'''
+Magic numbers for the square numbering used by GameState (bit 0 is a8, bit 63 is h1)
+For every square, ((blockers * magic) & FULL_BB) >> shift maps each subset of the relevant blockers to an index
+into that square's attack table without two subsets with different attacks ever sharing an index
+'''
+
+ROOK_MAGICS = (
+    0x008004D08020C000, 0x4040100020004000, 0x0080100080200008, 0x0100200810010004,
+    0x0200081005020020, 0x4100020801000400, 0x0880020000800100, 0x6600008200205401,
+    0x0508800880C001A0, 0x0080402000401001, 0x0011004100102000, 0x00060010A4420008,
+    0x0C00800400800800, 0x0000800400800200, 0x00C2000200040801, 0x000180088006CD00,
+    0x2380004000200040, 0x000041401001A000, 0x2011050010422002, 0x0023030010008820,
+    0x0000828004000800, 0x0D02880110402420, 0x0040140001B01208, 0x0000060000410884,
+    0x1010401480048420, 0x0000400140201000, 0x0080110100402002, 0x0200882300100100,
+    0x1109280280240080, 0x0100040080020080, 0x0400010400421008, 0x2002048200240449,
+    0x8080002000400044, 0x02D0012001400040, 0x2501801001802000, 0x0000180081801000,
+    0x12A4000480800800, 0x0850020080800400, 0x0000010804005042, 0x001041008A000444,
+    0x0008800100450020, 0x0440412010024000, 0x0040200010008080, 0x00800A0010220040,
+    0x1200040008008080, 0x0002000810020004, 0x1800021008040001, 0x0498040C50820021,
+    0x4A00284102088200, 0x0000402200811200, 0x0E01002002104D00, 0x8608008110010880,
+    0x0010080080040080, 0x442A004411880200, 0x2041008432004100, 0x0328010084004200,
+    0x800110624B008001, 0x8201022810804202, 0x0004400A20010011, 0x8001200500100009,
+    0x4412010420081002, 0x4001000400021831, 0x0408008802300104, 0x10060104044094A2,
+)
+
+BISHOP_MAGICS = (
+    0x0410501010802046, 0x02900210A400820A, 0x0122480044801500, 0x1930918204810000,
+    0x0254042100000101, 0x00090C0240480004, 0x0024042105100212, 0x0800402C10080400,
+    0x0020200842408400, 0x0805200852008027, 0x0202512802204050, 0x5080082080200400,
+    0x2000C40420888202, 0x8203008820084014, 0x000020A808080400, 0x0A020C8241182029,
+    0x22200040480200A0, 0x0002022004012210, 0x0002000108010103, 0x4020400401042000,
+    0x010C000A22A00000, 0x122A01C108010446, 0x000411010D180288, 0x00002A0084010801,
+    0x0414404020280180, 0x10840B0010100D02, 0xC0440400C0490020, 0x0040410008010900,
+    0x0001040002002100, 0x010808A012018410, 0x0801010812089044, 0x0804059304220110,
+    0x00021004A0102010, 0x0001143010202180, 0x0000440200900020, 0x0020100821040400,
+    0x1010120020060028, 0x0A1000A020220200, 0x20B020A100008402, 0x0604010218004040,
+    0x1842101084000A10, 0x041041480800200C, 0xC000101804000805, 0x8284282104002040,
+    0x2042200208810C04, 0x2018500040900200, 0x8045100400400100, 0x00E1510102100504,
+    0x0080444220100008, 0x8004410801110000, 0x48020A090C884144, 0x0606414084040011,
+    0x0420002008504091, 0x2200205481021000, 0x8020021001010600, 0x5008128806022000,
+    0x02020104020202C0, 0x86100A020202021D, 0x0025020100611001, 0x1020440000420204,
+    0x4200100010021A02, 0x0601004004480080, 0x0000040810140092, 0x008450040F040050,
+)
+
+
+'''
+Squares attacked from sq by a piece sliding in the given directions, stopping at (and including) the first blocker in occ
+'''
+
+
+def slidingAttacks(sq, occ, directions):
+    attacks = 0
+    row, col = sq // 8, sq % 8
+    for d in directions:
+        for i in range(1, 8):
+            endRow = row + d[0] * i
+            endCol = col + d[1] * i
+            if 0 <= endRow < 8 and 0 <= endCol < 8:
+                endBit = 1 << (endRow * 8 + endCol)
+                attacks |= endBit
+                if occ & endBit:  # blocked
+                    break
+            else:  # off board
+                break
+    return attacks
+
+
+'''
+Builds the blocker masks, shifts and attack tables for one kind of slider
+The mask of a square leaves out the board edge since a blocker there cannot shorten a ray
+'''
+
+
+def initMagics(directions, magics):
+    masks, shifts, attackTables = [], [], []
+    for sq in range(64):
+        mask = slidingAttacks(sq, 0, directions)
+        row, col = sq // 8, sq % 8
+        if row != 0:
+            mask &= ~RANK_8
+        if row != 7:
+            mask &= ~RANK_1
+        if col != 0:
+            mask &= NOT_FILE_A
+        if col != 7:
+            mask &= NOT_FILE_H
+        shift = 64 - bin(mask).count('1')
+        table = [0] * (1 << (64 - shift))
+        blockers = 0
+        while True:  # visit every subset of the mask
+            table[((blockers * magics[sq]) & FULL_BB) >> shift] = slidingAttacks(sq, blockers, directions)
+            blockers = (blockers - mask) & mask
+            if blockers == 0:
+                break
+        masks.append(mask)
+        shifts.append(shift)
+        attackTables.append(table)
+    return masks, shifts, attackTables
+
+
+ROOK_MASKS, ROOK_SHIFTS, ROOK_ATTACKS = initMagics(ROOK_DIRECTIONS, ROOK_MAGICS)
+BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_ATTACKS = initMagics(BISHOP_DIRECTIONS, BISHOP_MAGICS)
+
+
+'''
+Rook and bishop attacks from sq given the occupancy of the board, each is a single table lookup
+'''
+
+
+def rookAttacks(sq, occ):
+    return ROOK_ATTACKS[sq][((occ & ROOK_MASKS[sq]) * ROOK_MAGICS[sq] & FULL_BB) >> ROOK_SHIFTS[sq]]
+
+
+def bishopAttacks(sq, occ):
+    return BISHOP_ATTACKS[sq][((occ & BISHOP_MASKS[sq]) * BISHOP_MAGICS[sq] & FULL_BB) >> BISHOP_SHIFTS[sq]]
+
+
+'''
+Knight attacks of every knight in a bitboard at once, and knight and king attacks from every square
+Shifting by +-1 or +-2 columns wraps around the board edge, so the files the piece cannot land on are masked out
+'''
+
+
+def knightSetAttacks(knights):
+    return (((knights >> 15) | (knights << 17)) & NOT_FILE_A) | (((knights >> 17) | (knights << 15)) & NOT_FILE_H) | \
+        (((knights >> 6) | (knights << 10)) & NOT_FILE_AB) | (((knights >> 10) | (knights << 6)) & NOT_FILE_GH)
+
+
+def initLeaperAttacks():
+    knightAttacks, kingAttacks = [], []
+    for sq in range(64):
+        bit = 1 << sq
+        king = (((bit >> 8) | (bit << 8)) & FULL_BB) | (((bit >> 7) | (bit << 1) | (bit << 9)) & NOT_FILE_A) | \
+            (((bit >> 9) | (bit >> 1) | (bit << 7)) & NOT_FILE_H)
+        knightAttacks.append(knightSetAttacks(bit))
+        kingAttacks.append(king)
+    return tuple(knightAttacks), tuple(kingAttacks)
+
+
+KNIGHT_ATTACKS, KING_ATTACKS = initLeaperAttacks()
+# squares a white / black pawn on each square captures on
+WHITE_PAWN_ATTACKS = tuple((((1 << sq) >> 9) & NOT_FILE_H) | (((1 << sq) >> 7) & NOT_FILE_A) for sq in range(64))
+BLACK_PAWN_ATTACKS = tuple((((1 << sq) << 7) & NOT_FILE_H) | (((1 << sq) << 9) & NOT_FILE_A) for sq in range(64))
+
+
+'''
+Lookup tables for every pair of squares a and b on the same rank, file or diagonal (both are 0 when not aligned):
+LINE_BB[a][b] is the whole line through them, edge to edge with a and b included. A piece pinned on b to a king on a
+can only move within it
+BETWEEN_BB[a][b] is the set of squares strictly between them, where a check from b on a king on a can be blocked
+'''
+
+
+def initLineTables():
+    lines, between = [], []
+    for a in range(64):
+        lineRow, betweenRow = [], []
+        for b in range(64):
+            line = squares = 0
+            for attacks in (rookAttacks, bishopAttacks):
+                if a != b and attacks(a, 0) & (1 << b):
+                    line = (attacks(a, 0) & attacks(b, 0)) | (1 << a) | (1 << b)
+                    squares = attacks(a, 1 << b) & attacks(b, 1 << a)
+            lineRow.append(line)
+            betweenRow.append(squares)
+        lines.append(tuple(lineRow))
+        between.append(tuple(betweenRow))
+    return tuple(lines), tuple(between)
+
+
+LINE_BB, BETWEEN_BB = initLineTables()
+
+
+'''
+A move is packed into a single int, which also serves as its ID:
+bits 0-5 start square, bits 6-11 end square, bits 12-15 code of the piece moved, bits 16-19 code of the piece captured
+(EMPTY if none), bits 20 and up are left free for move flags
+'''
+
+
+def packMove(startSq, endSq, pieceMoved, pieceCaptured):
+    return startSq | (endSq << 6) | (pieceMoved << 12) | (pieceCaptured << 16)
+
+
+def unpackMove(move):
+    return move & 63, (move >> 6) & 63, (move >> 12) & 15, (move >> 16) & 15
+
+
+'''
+Zobrist keys: one random 64 bit number per piece code and square, XOR'd together for every piece on the board,
+plus ZOBRIST_SIDE when black is to move. The EMPTY row is all zeros so an empty square hashes to nothing
+A fixed seed keeps the keys identical between runs
+'''
+zobristRandom = random.Random(0)
+ZOBRIST = tuple(tuple(0 if code == EMPTY else zobristRandom.getrandbits(64) for _ in range(64))
+                for code in range(len(PIECE_NAMES)))
+ZOBRIST_SIDE = zobristRandom.getrandbits(64)
+TT_BUCKETS = 1 << 14  # number of transposition table buckets, must be a power of 2
+TT_WAYS = 4  # entries per bucket: TT_WAYS - 1 depth-preferred slots followed by one always-replace slot
+
+
+class TranspositionTable():
+    '''
+    Fixed size hash table keyed by Zobrist key, organised in buckets of TT_WAYS entries
+    The keys and depths live in flat arrays of machine ints, a bucket's entries are next to each other,
+    and probing reads only that bucket
+    '''
+
+    def __init__(self, buckets=TT_BUCKETS):
+        self.mask = buckets - 1
+        self.keys = array('Q', [0]) * (buckets * TT_WAYS)
+        self.depths = array('b', [-1]) * (buckets * TT_WAYS)  # -1 marks an empty entry
+        self.data = [None] * (buckets * TT_WAYS)
+
+    '''
+    Returns the data stored for key, or None if it is not in the table
+    '''
+
+    def probe(self, key):
+        base = (key & self.mask) * TT_WAYS
+        keys = self.keys
+        for i in range(base, base + TT_WAYS):
+            if keys[i] == key and self.depths[i] >= 0:
+                return self.data[i]
+        return None
+
+    '''
+    Stores data for key, searched to depth
+    An entry for the same key is overwritten in place, otherwise the shallowest depth-preferred entry is replaced
+    if depth is strictly deeper, and the always-replace entry is used if not (so equal depths land there too)
+    '''
+
+    def store(self, key, depth, data):
+        base = (key & self.mask) * TT_WAYS
+        keys, depths = self.keys, self.depths
+        slot = base
+        for i in range(base, base + TT_WAYS):
+            if keys[i] == key and depths[i] >= 0:  # same position
+                slot = i
+                break
+            if i < base + TT_WAYS - 1 and depths[i] < depths[slot]:
+                slot = i
+        else:
+            if depth <= depths[slot]:
+                slot = base + TT_WAYS - 1
+        keys[slot] = key
+        depths[slot] = depth
+        self.data[slot] = data
+
 
 class GameState():
     def __init__(self):
         """
-        The board is an 8x8 2D list, each element is a string of 2 chars
-        The first char represents the color of the piece, 'b' or 'w'
-        The second char represents the type of the piece, 'K', 'Q', 'R', 'N', 'B', 'P'
-        '--' represents an empty space with no piece
+        The board is stored as 12 bitboards, one per piece type and color, indexed by the piece code (WHITE | PAWN, ...)
+        Square (row, col) maps to bit row * 8 + col, so bit 0 is a8 and bit 63 is h1
+        occW, occB and occ are the occupancy bitboards of the white pieces, the black pieces and all pieces
+        The 8x8 list of strings ('--' for an empty space) is only built on demand, see board
         """
-        self.board = [
+        startBoard = [
             ["bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR"],
             ["bP", "bP", "bP", "bP", "bP", "bP", "bP", "bP"],
             ["--", "--", "--", "--", "--", "--", "--", "--"],
@@ -21,432 +298,452 @@ class GameState():
             ["wP", "wP", "wP", "wP", "wP", "wP", "wP", "wP"],
             ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]
         ]
-        self.moveFunction = {'P': self.getPawnMoves, 'R': self.getRookMoves, 'N': self.getKnightMoves,
-                             'B': self.getBishopMoves, 'Q': self.getQueenMoves, 'K': self.getKingMoves}
+        self.bb = [0] * 16  # one bitboard per piece code, the entries of unused codes stay 0
+        self.pieceAt = bytearray(64)  # piece code on each square (one byte each), kept in sync with the bitboards
+        self.occW = 0
+        self.occB = 0
+        for r in range(8):
+            for c in range(8):
+                code = PIECE_CODES[startBoard[r][c]]
+                if code != EMPTY:
+                    self.bb[code] |= 1 << (r * 8 + c)
+                    self.pieceAt[r * 8 + c] = code
+                    if code & BLACK:
+                        self.occB |= 1 << (r * 8 + c)
+                    else:
+                        self.occW |= 1 << (r * 8 + c)
+        self.occ = self.occW | self.occB
+        self.zobristKey = 0  # hash of the position, updated incrementally by makeMove and undoMove
+        for sq in range(64):
+            self.zobristKey ^= ZOBRIST[self.pieceAt[sq]][sq]
+        # (inCheck, pinned, checks, moves) of positions seen by getValidMoves, stored as depth 0 entries
+        self.tt = TranspositionTable()
+        self.moveBuffer = []  # scratch list the generators append to, reused by every getValidMoves call
+        self.boardView = None  # cached 8x8 view of the bitboards, reset whenever a move is made or undone
+        # move generator for each piece type, indexed by the low 3 bits of a piece code
+        # pawns are not in here, the side to move's pawn generator handles all of them at once
+        self.moveFunction = (None, None, self.getKnightMoves, self.getBishopMoves,
+                             self.getRookMoves, self.getQueenMoves, self.getKingMoves)
+        self.pawnMoveFunction = self.getWhitePawnMoves  # swapped by makeMove and undoMove along with the turn
         self.whiteToMove = True
         self.moveLog = []
         self.whiteKingLocation = (7, 4)
         self.blackKingLocation = (0, 4)
         self.inCheck = False
-        self.pins = []  # keeps track of locations of pinned pieces
+        self.pinned = 0  # bitboard of the ally pieces pinned to their king
+        # squares non-king moves must end on: anywhere, or when in check the squares that capture or block the checker
+        self.targetMask = FULL_BB
         self.checks = []  # keeps track of locations of pieces attacking the king
 
     '''
-    Takes a Move as a parameter and executes it (does not work for castling, pawn promotion, en passant)
+    8x8 2D list view of the bitboards, materialized lazily and cached until the next move
+    '''
+
+    @property
+    def board(self):
+        if self.boardView is None:
+            self.boardView = [[PIECE_NAMES[code] for code in self.pieceAt[r * 8:r * 8 + 8]] for r in range(8)]
+        return self.boardView
+
+    '''
+    Takes a packed move as a parameter and executes it (does not work for castling, pawn promotion, en passant)
     '''
 
     def makeMove(self, move):
-        self.board[move.startRow][move.startCol] = '--'
-        self.board[move.endRow][move.endCol] = move.pieceMoved
+        startSq, endSq, pieceMoved, pieceCaptured = unpackMove(move)
+        startBit = 1 << startSq
+        endBit = 1 << endSq
+        self.bb[pieceMoved] ^= startBit | endBit
+        if pieceCaptured != EMPTY:
+            self.bb[pieceCaptured] ^= endBit
+        self.pieceAt[startSq] = EMPTY
+        self.pieceAt[endSq] = pieceMoved
+        self.zobristKey ^= ZOBRIST[pieceMoved][startSq] ^ ZOBRIST[pieceMoved][endSq] ^ \
+            ZOBRIST[pieceCaptured][endSq] ^ ZOBRIST_SIDE
+        if pieceMoved & BLACK:
+            self.occB ^= startBit | endBit
+            self.occW &= ~endBit
+        else:
+            self.occW ^= startBit | endBit
+            self.occB &= ~endBit
+        self.occ = self.occW | self.occB
+        self.boardView = None
         self.moveLog.append(move)
         # update king's location if moved
-        if move.pieceMoved == 'wK':
-            self.whiteKingLocation = (move.endRow, move.endCol)
-        elif move.pieceMoved == 'bK':
-            self.blackKingLocation = (move.endRow, move.endCol)
+        if pieceMoved == WHITE | KING:
+            self.whiteKingLocation = (endSq // 8, endSq % 8)
+        elif pieceMoved == BLACK | KING:
+            self.blackKingLocation = (endSq // 8, endSq % 8)
         self.whiteToMove = not self.whiteToMove  # switch turns
+        self.pawnMoveFunction = self.getWhitePawnMoves if self.whiteToMove else self.getBlackPawnMoves
 
     def undoMove(self):
         if len(self.moveLog) != 0:
-            move = self.moveLog.pop()
-            self.board[move.startRow][move.startCol] = move.pieceMoved
-            self.board[move.endRow][move.endCol] = move.pieceCaptured
+            startSq, endSq, pieceMoved, pieceCaptured = unpackMove(self.moveLog.pop())
+            startBit = 1 << startSq
+            endBit = 1 << endSq
+            self.bb[pieceMoved] ^= startBit | endBit
+            self.pieceAt[startSq] = pieceMoved
+            self.pieceAt[endSq] = pieceCaptured
+            self.zobristKey ^= ZOBRIST[pieceMoved][startSq] ^ ZOBRIST[pieceMoved][endSq] ^ \
+                ZOBRIST[pieceCaptured][endSq] ^ ZOBRIST_SIDE
+            if pieceMoved & BLACK:
+                self.occB ^= startBit | endBit
+            else:
+                self.occW ^= startBit | endBit
+            if pieceCaptured != EMPTY:
+                self.bb[pieceCaptured] ^= endBit
+                if pieceCaptured & BLACK:
+                    self.occB |= endBit
+                else:
+                    self.occW |= endBit
+            self.occ = self.occW | self.occB
+            self.boardView = None
             # update king's location if moved
-            if move.pieceMoved == 'wK':
-                self.whiteKingLocation = (move.startRow, move.startCol)
-            elif move.pieceMoved == 'bK':
-                self.blackKingLocation = (move.startRow, move.startCol)
+            if pieceMoved == WHITE | KING:
+                self.whiteKingLocation = (startSq // 8, startSq % 8)
+            elif pieceMoved == BLACK | KING:
+                self.blackKingLocation = (startSq // 8, startSq % 8)
             self.whiteToMove = not self.whiteToMove  # switch turns back
+            self.pawnMoveFunction = self.getWhitePawnMoves if self.whiteToMove else self.getBlackPawnMoves
 
     '''
-    All moves considering checks
+    All moves considering checks, as an array('I') of packed moves
+    The array is remembered for the position and handed out again when it recurs, so callers must not modify it
     '''
 
     def getValidMoves(self):
-        moves = []
-        self.inCheck, self.pins, self.checks = self.checkForPinsAndChecks()
+        entry = self.tt.probe(self.zobristKey)
+        if entry is not None:  # position seen before
+            self.inCheck, self.pinned, self.checks, moves = entry
+            return moves
+        moves = self.moveBuffer
+        del moves[:]
+        self.inCheck, self.pinned, self.checks = self.checkForPinsAndChecks()
         kingLocation = self.whiteKingLocation if self.whiteToMove else self.blackKingLocation
-        kingRow, kingCol = kingLocation
+        kingSq = kingLocation[0] * 8 + kingLocation[1]
         if self.inCheck:
             if len(self.checks) == 1:  # only 1 check, block check or move king
-                moves = self.getAllPossibleMoves()
-                # blocking: to block a check, you must move a piece into one of the squares between the enemy piece and the king
                 check = self.checks[0]  # check info
-                checkRow, checkCol = check[0], check[1]
-                # enemy piece causing the check
-                pieceChecking = self.board[checkRow][checkCol]
-                validSquares = []  # squares that pieces can move to
-                # special case: if pieceChecking is knight, must capture knight or move king, other pieces can be blocked
-                if pieceChecking[1] == 'N':
-                    validSquares = [(checkRow, checkCol)]
-                else:  # if piece is not a knight, we can block the check as well
-                    # generate all squares where pieces can go to block the check
-                    for i in range(1, 8):
-                        # (check[2], check[3]) is the check direction
-                        validSquare = (
-                            kingRow + check[2] * i, kingCol + check[3] * i)
-                        validSquares.append(validSquare)
-                        # reached the piece causing check
-                        if validSquare[0] == checkRow and validSquare[1] == checkCol:
-                            break
-                    # get rid of moves that don't block check or move king
-                    # go backwards when removing from a list by iterating through it
-                    for i in range(len(moves) - 1, -1, -1):
-                        # king not moved so this move must block or capture the pieceChecking
-                        if moves[i].pieceMoved[1] != 'K':
-                            # move doesn't block or capture pieceChecking
-                            if not (moves[i].endRow, moves[i].endCol) in validSquares:
-                                moves.remove(moves[i])
+                checkSq = check[0] * 8 + check[1]
+                # to block a check, you must move a piece into one of the squares between the enemy piece and the king,
+                # or capture it. Nothing lies between the king and a knight (or pawn), so those can only be captured
+                self.targetMask = BETWEEN_BB[kingSq][checkSq] | (1 << checkSq)
+                self.getAllPossibleMoves(moves)
             else:  # double check, king has to move
-                self.getKingMoves(kingRow, kingCol, moves)
+                self.getKingMoves(kingSq, moves)
         else:  # not in check, hence all moves allowed
-            moves = self.getAllPossibleMoves()
+            self.targetMask = FULL_BB
+            self.getAllPossibleMoves(moves)
 
+        # the buffer is reused by the next call, keep a compact copy: 4 bytes per move instead of a pointer and an int
+        moves = array('I', moves)
+        self.tt.store(self.zobristKey, 0, (self.inCheck, self.pinned, self.checks, moves))
         return moves
 
     '''
-    Returns if a player is in check, a list of pins, a list of checks
+    Bitboard of the pieces of byColor (WHITE or BLACK) attacking sq, with sliders blocked by the pieces in occ
+    '''
+
+    def attackersTo(self, sq, occ, byColor):
+        bb = self.bb
+        # a pawn of byColor attacks sq from the squares a pawn of the other color on sq would capture on
+        pawnAttacks = WHITE_PAWN_ATTACKS[sq] if byColor == BLACK else BLACK_PAWN_ATTACKS[sq]
+        queens = bb[byColor | QUEEN]
+        return (pawnAttacks & bb[byColor | PAWN]) | (KNIGHT_ATTACKS[sq] & bb[byColor | KNIGHT]) | \
+            (bishopAttacks(sq, occ) & (bb[byColor | BISHOP] | queens)) | \
+            (rookAttacks(sq, occ) & (bb[byColor | ROOK] | queens)) | (KING_ATTACKS[sq] & bb[byColor | KING])
+
+    '''
+    Determine if the square (r, c) is under attack by the pieces of byColor, looking outwards from it instead of
+    generating moves
+    '''
+
+    def squareUnderAttack(self, r, c, byColor):
+        return self.attackersTo(r * 8 + c, self.occ, byColor) != 0
+
+    '''
+    Bitboard of every square attacked by the enemy pieces, with sliders blocked by the pieces in occ
+    '''
+
+    def getEnemyAttacks(self, occ):
+        bb = self.bb
+        whiteToMove = self.whiteToMove
+        enemyColor = BLACK if whiteToMove else WHITE
+        # all enemy pawns at once: a pawn captures one row forward, one column to either side
+        pawns = bb[enemyColor | PAWN]
+        if whiteToMove:
+            attacks = ((pawns << 7) & NOT_FILE_H) | ((pawns << 9) & NOT_FILE_A)  # the masks also drop bits past 63
+        else:
+            attacks = ((pawns >> 9) & NOT_FILE_H) | ((pawns >> 7) & NOT_FILE_A)
+        attacks |= knightSetAttacks(bb[enemyColor | KNIGHT])  # all enemy knights at once as well
+        king = bb[enemyColor | KING]
+        if king:
+            attacks |= KING_ATTACKS[king.bit_length() - 1]
+        queens = bb[enemyColor | QUEEN]
+        for pieces, sliderAttacks in ((bb[enemyColor | BISHOP] | queens, bishopAttacks),
+                                      (bb[enemyColor | ROOK] | queens, rookAttacks)):
+            while pieces:
+                sq = (pieces & -pieces).bit_length() - 1
+                pieces &= pieces - 1
+                attacks |= sliderAttacks(sq, occ)
+        return attacks
+
+    '''
+    Returns if a player is in check, a bitboard of the pinned ally pieces, a list of checks
     '''
 
     def checkForPinsAndChecks(self):
-        pins = []  # squares where the ally pinned piece is and direction pinned from
+        pinned = 0  # squares where the ally pinned pieces are
         checks = []  # squares where enemy is applying a check
-        inCheck = False
-        enemyColor = 'b' if self.whiteToMove else 'w'
-        allyColor = 'w' if self.whiteToMove else 'b'
-        kingLocation = self.whiteKingLocation if self.whiteToMove else self.blackKingLocation
+        bb = self.bb
+        whiteToMove = self.whiteToMove
+        enemyColor = BLACK if whiteToMove else WHITE
+        allyOcc = self.occW if whiteToMove else self.occB
+        kingLocation = self.whiteKingLocation if whiteToMove else self.blackKingLocation
         startRow, startCol = kingLocation
-
-        # check outward from king for pins and checks, keep track of pins
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1),
-                      (-1, -1), (-1, 1), (1, -1), (1, 1))
-        for j in range(len(directions)):
-            d = directions[j]
-            possiblePin = ()  # reset possible pins
-            for i in range(1, 8):
-                endRow, endCol = startRow + d[0] * i, startCol + d[1] * i
-                if 0 <= endRow < 8 and 0 <= endCol < 8:
-                    endPiece = self.board[endRow][endCol]
-                    if endPiece[0] == allyColor and endPiece[1] != 'K':
-                        if possiblePin == ():  # 1st allied piece could be pinned
-                            possiblePin = (endRow, endCol, d[0], d[1])
-                        else:  # 2nd allied piece along the same direction, so no pin or check possible in this direction
-                            break
-                    elif endPiece[0] == enemyColor:
-                        type = endPiece[1]
-                        # Five possibilities here:
-                        # 1. orthogonally away from king and piece is a rook
-                        # 2. diagonally away from king and piece is a bishop
-                        # 3. 1 square away diagonally from king and piece is a pawn
-                        # 4. any direction and piece is a queen
-                        # 5. any direction 1 square away and piece is a king
-                        if (0 <= j < 3 and type == 'R') or (4 <= j < 7 and type == 'B') or (i == 1 and type == 'P' and ((enemyColor == 'w' and 6 <= j <= 7) or (enemyColor == 'b' and 4 <= j <= 5))) or (type == 'Q') or (i == 1 and type == 'K'):
-                            if possiblePin == ():  # no piece blocking, so check
-                                inCheck = True
-                                checks.append((endRow, endCol, d[0], d[1]))
-                                break
-                            else:  # there is a pin in this direction
-                                pins.append(possiblePin)
-                                break
-                        else:  # enemy piece not applying check
-                            break
-                else:  # off board
-                    break
-        # check for knight checks
-        knightDirections = ((2, 1), (2, -1), (-2, 1), (-2, -1),
-                            (1, 2), (1, -2), (-1, 2), (-1, -2))
-        for d in knightDirections:
-            endRow, endCol = startRow + d[0], startCol + d[1]
-            if 0 <= endRow < 8 and 0 <= endCol < 8:
-                endPiece = self.board[endRow][endCol]
-                # enemy knight attacking king
-                if endPiece[0] == enemyColor and endPiece[1] == 'N':
-                    inCheck = True
-                    checks.append((endRow, endCol, d[0], d[1]))
-                else:
-                    break
-        return inCheck, pins, checks
+        kingSq = startRow * 8 + startCol
+        occ = self.occ
+
+        checkers = self.attackersTo(kingSq, occ, enemyColor)
+        while checkers:
+            endSq = (checkers & -checkers).bit_length() - 1
+            checkers &= checkers - 1
+            endRow, endCol = endSq // 8, endSq % 8
+            # direction from the king to the piece giving check
+            checks.append((endRow, endCol, (endRow > startRow) - (endRow < startRow),
+                           (endCol > startCol) - (endCol < startCol)))
+
+        # pins: take the first ally piece along each ray out of the board and shoot the rays again, an enemy slider
+        # that only shows up now is pinning that piece to the king
+        queens = bb[enemyColor | QUEEN]
+        for attacks, snipers in ((rookAttacks, bb[enemyColor | ROOK] | queens),
+                                 (bishopAttacks, bb[enemyColor | BISHOP] | queens)):
+            rays = attacks(kingSq, occ)
+            blockers = rays & allyOcc
+            pinners = attacks(kingSq, occ ^ blockers) & ~rays & snipers
+            while pinners:
+                pinnerSq = (pinners & -pinners).bit_length() - 1
+                pinners &= pinners - 1
+                pinned |= BETWEEN_BB[kingSq][pinnerSq] & allyOcc  # the one ally piece between king and pinner
+        return len(checks) > 0, pinned, checks
 
     '''
-    Determine if the current player is under check
+    All moves not considering checks, added to the moves list
     '''
 
-    '''def inCheck(self):
-        kingLocation = self.whiteKingLocation if self.whiteToMove else self.blackKingLocation
-        return self.squareUnderAttack(kingLocation[0], kingLocation[1])
-
-    ''
-    Determine if the square (r, c) is under attack
-    ''
-
-    def squareUnderAttack(self, r, c):
-        # switch to opponent's turn to get opponent's moves
-        self.whiteToMove = not self.whiteToMove
-        oppMoves = self.getAllPossibleMoves()
-        self.whiteToMove = not self.whiteToMove  # switch turns back
-        for move in oppMoves:
-            if move.endRow == r and move.endCol == c:  # square is under attack
-                return True
-        return False'''
-
-    '''
-    All moves not considering checks
-    '''
-
-    def getAllPossibleMoves(self):
-        moves = []
-        for r in range(len(self.board)):
-            for c in range(len(self.board[r])):
-                turn = self.board[r][c][0]  # 'b' or 'w'
-                if (turn == 'w' and self.whiteToMove) or (turn == 'b' and not self.whiteToMove):
-                    piece = self.board[r][c][1]
-                    # get all moves for the piece located at (r, c)
-                    self.moveFunction[piece](r, c, moves)
-        return moves
+    def getAllPossibleMoves(self, moves):
+        self.pawnMoveFunction(moves)
+        moveFunction = self.moveFunction
+        pieceAt = self.pieceAt
+        allyOcc = (self.occW & ~self.bb[WHITE | PAWN]) if self.whiteToMove else (self.occB & ~self.bb[BLACK | PAWN])
+        while allyOcc:  # visit the ally pieces only, lowest square first
+            sq = (allyOcc & -allyOcc).bit_length() - 1
+            allyOcc &= allyOcc - 1
+            # get all moves for the piece located at sq
+            moveFunction[pieceAt[sq] & 7](sq, moves)
 
     '''
-    Get all the pawn moves for the pawn located at (row, col) and add them to the moves list
+    Split the ally pawns into the groups that can be generated together when some of them are pinned
+    Unpinned pawns are one group, pinned pawns go one at a time, each limited to its line through the king
     '''
 
-    def getPawnMoves(self, row, col, moves):
-        piecePinned = False
-        pinDirection = ()
-        for i in range(len(self.pins) - 1, -1, -1):
-            if self.pins[i][0] == row and self.pins[i][1] == col:
-                piecePinned = True
-                pinDirection = (self.pins[i][2], self.pins[i][3])
-                self.pins.remove(self.pins[i])
-                break
+    def getPawnGroups(self, pawns, kingLocation):
+        pinned = self.pinned
+        targetMask = self.targetMask
+        groups = [(pawns & ~pinned, targetMask)]
+        pinnedPawns = pawns & pinned
+        if pinnedPawns:
+            kingLines = LINE_BB[kingLocation[0] * 8 + kingLocation[1]]
+            while pinnedPawns:
+                pawn = pinnedPawns & -pinnedPawns
+                pinnedPawns ^= pawn
+                groups.append((pawn, targetMask & kingLines[pawn.bit_length() - 1]))
+        return groups
 
-        if self.whiteToMove:  # white pawn moves
-            # pawn advances
-            if self.board[row - 1][col] == '--':  # 1 square advance
-                # can move only if not pinned or if pinned, in the pin direction
-                if not piecePinned or pinDirection == (-1, 0):
-                    moves.append(Move((row, col), (row - 1, col), self.board))
-                    # 2 square advance
-                    if row == 6 and self.board[row - 2][col] == '--':
-                        moves.append(
-                            Move((row, col), (row - 2, col), self.board))
-            # pawn captures
-            if col - 1 >= 0:  # captures to the left
-                if self.board[row - 1][col - 1][0] == 'b':
-                    # can move only if not pinned or if pinned, in the pin direction
-                    if not piecePinned or pinDirection == (-1, -1):
-                        moves.append(
-                            Move((row, col), (row - 1, col - 1), self.board))
-            if col + 1 <= 7:  # captures to the right
-                if self.board[row - 1][col + 1][0] == 'b':
-                    # can move only if not pinned or if pinned, in the pin direction
-                    if not piecePinned or pinDirection == (-1, 1):
-                        moves.append(
-                            Move((row, col), (row - 1, col + 1), self.board))
-
-        else:  # black pawn moves
-            # pawn advances
-            if self.board[row + 1][col] == '--':  # 1 square advance
-                # can move only if not pinned or if pinned, in the pin direction
-                if not piecePinned or pinDirection == (1, 0):
-                    moves.append(Move((row, col), (row + 1, col), self.board))
-                    # 2 square advance
-                    if row == 1 and self.board[row + 2][col] == '--':
-                        moves.append(
-                            Move((row, col), (row + 2, col), self.board))
-            # pawn captures
-            if col - 1 >= 0:  # captures to the left
-                if self.board[row + 1][col - 1][0] == 'w':
-                    # can move only if not pinned or if pinned, in the pin direction
-                    if not piecePinned or pinDirection == (1, -1):
-                        moves.append(
-                            Move((row, col), (row + 1, col - 1), self.board))
-            if col + 1 <= 7:  # captures to the right
-                if self.board[row + 1][col + 1][0] == 'w':
-                    # can move only if not pinned or if pinned, in the pin direction
-                    if not piecePinned or pinDirection == (1, 1):
-                        moves.append(
-                            Move((row, col), (row + 1, col + 1), self.board))
-
-    '''
-    Get all the rook moves for the rook located at (row, col) and add them to the moves list
-    '''
-
-    def getRookMoves(self, row, col, moves):
-        piecePinned = False
-        pinDirection = ()
-        for i in range(len(self.pins) - 1, -1, -1):
-            if self.pins[i][0] == row and self.pins[i][1] == col:
-                piecePinned = True
-                pinDirection = (self.pins[i][2], self.pins[i][3])
-                # can't remove queen from pin on rook moves, only remove it on bishop moves
-                if self.board[row][col][1] != 'Q':
-                    self.pins.remove(self.pins[i])
-                break
+    '''
+    Get the moves of all the white pawns at once and add them to the moves list
+    Each kind of pawn move is one shift of the whole pawn bitboard, masked to the squares it may end on
+    White pawns move up the board, towards bit 0
+    '''
 
-        # down, up, left, right
-        directions = ((-1, 0), (1, 0), (0, -1), (0, 1))
-        enemyColor = 'b' if self.whiteToMove else 'w'
-
-        for d in directions:
-            for i in range(1, 8):
-                endRow = row + d[0] * i
-                endCol = col + d[1] * i
-
-                if 0 <= endRow < 8 and 0 <= endCol < 8:
-                    # add moves if not pinned, and if pinned, can move towards or away from the pin
-                    if not piecePinned or pinDirection == d or pinDirection == (-d[0], -d[1]):
-                        endPiece = self.board[endRow][endCol]
-                        if endPiece == '--':  # empty space
-                            moves.append(
-                                Move((row, col), (endRow, endCol), self.board))
-                        elif endPiece[0] == enemyColor:  # enemy piece
-                            moves.append(
-                                Move((row, col), (endRow, endCol), self.board))
-                            break
-                        else:  # friendly piece
-                            break
-                else:  # off board
-                    break
+    def getWhitePawnMoves(self, moves):
+        pieceAt = self.pieceAt
+        append = moves.append
+        empty = ~self.occ & FULL_BB
+        enemyOcc = self.occB
+        pawns = self.bb[WHITE | PAWN]
+        groups = self.getPawnGroups(pawns, self.whiteKingLocation) if pawns & self.pinned else ((pawns, self.targetMask),)
+        for pawns, allowed in groups:
+            push1 = (pawns >> 8) & empty
+            push2 = ((push1 & RANK_3) >> 8) & empty
+            captureLeft = (pawns >> 9) & NOT_FILE_H & enemyOcc
+            captureRight = (pawns >> 7) & NOT_FILE_A & enemyOcc
+            # offset takes a target square back to the square the pawn started on
+            for endSquares, offset in ((push1, 8), (push2, 16), (captureLeft, 9), (captureRight, 7)):
+                endSquares &= allowed
+                while endSquares:
+                    endSq = (endSquares & -endSquares).bit_length() - 1
+                    endSquares &= endSquares - 1
+                    append((endSq + offset) | (endSq << 6) | ((WHITE | PAWN) << 12) | (pieceAt[endSq] << 16))
 
     '''
-    Get all the knight moves for the knight located at (row, col) and add them to the moves list
+    Get the moves of all the black pawns at once and add them to the moves list, mirroring getWhitePawnMoves
+    Black pawns move down the board, towards bit 63
     '''
 
-    def getKnightMoves(self, row, col, moves):
-        piecePinned = False
-        for i in range(len(self.pins) - 1, -1, -1):
-            if self.pins[i][0] == row and self.pins[i][1] == col:
-                piecePinned = True
-                self.pins.remove(self.pins[i])
-                break
+    def getBlackPawnMoves(self, moves):
+        pieceAt = self.pieceAt
+        append = moves.append
+        empty = ~self.occ & FULL_BB
+        enemyOcc = self.occW
+        pawns = self.bb[BLACK | PAWN]
+        groups = self.getPawnGroups(pawns, self.blackKingLocation) if pawns & self.pinned else ((pawns, self.targetMask),)
+        for pawns, allowed in groups:
+            push1 = (pawns << 8) & empty
+            push2 = ((push1 & RANK_6) << 8) & empty
+            captureLeft = (pawns << 7) & NOT_FILE_H & enemyOcc
+            captureRight = (pawns << 9) & NOT_FILE_A & enemyOcc
+            # offset takes a target square back to the square the pawn started on
+            for endSquares, offset in ((push1, -8), (push2, -16), (captureLeft, -7), (captureRight, -9)):
+                endSquares &= allowed
+                while endSquares:
+                    endSq = (endSquares & -endSquares).bit_length() - 1
+                    endSquares &= endSquares - 1
+                    append((endSq + offset) | (endSq << 6) | ((BLACK | PAWN) << 12) | (pieceAt[endSq] << 16))
 
-        directions = ((2, 1), (2, -1), (-2, 1), (-2, -1),
-                      (1, 2), (1, -2), (-1, 2), (-1, -2))
-        enemyColor = 'b' if self.whiteToMove else 'w'
+    '''
+    Add the moves of the slider on sq to the moves list, given the squares it attacks
+    Captures of ally pieces are dropped and, when in check, so is anything that neither captures nor blocks the checker
+    '''
 
-        for d in directions:
-            endRow = row + d[0]
-            endCol = col + d[1]
+    def addSliderMoves(self, sq, attacks, moves):
+        whiteToMove = self.whiteToMove
+        allyOcc = self.occW if whiteToMove else self.occB
+        pieceAt = self.pieceAt
+        moveBits = sq | (pieceAt[sq] << 12)
+
+        attacks &= ~allyOcc & self.targetMask
+        # if pinned, can only move towards or away from the king along the pin
+        if self.pinned & (1 << sq):
+            kingRow, kingCol = self.whiteKingLocation if whiteToMove else self.blackKingLocation
+            attacks &= LINE_BB[kingRow * 8 + kingCol][sq]
+        append = moves.append
+        while attacks:  # one move per set bit, lowest square first
+            endBit = attacks & -attacks
+            attacks ^= endBit
+            endSq = endBit.bit_length() - 1
+            append(moveBits | (endSq << 6) | (pieceAt[endSq] << 16))
 
-            if 0 <= endRow < 8 and 0 <= endCol < 8:
-                if not piecePinned:
-                    endPiece = self.board[endRow][endCol]
-                    if endPiece == '--':  # empty space
-                        moves.append(
-                            Move((row, col), (endRow, endCol), self.board))
-                    elif endPiece[0] == enemyColor:  # enemy piece
-                        moves.append(
-                            Move((row, col), (endRow, endCol), self.board))
-                    else:  # friendly piece
-                        continue
-            else:  # off board
-                break
+    '''
+    Get all the rook moves for the rook on square sq and add them to the moves list
+    '''
+
+    def getRookMoves(self, sq, moves):
+        self.addSliderMoves(sq, rookAttacks(sq, self.occ), moves)
 
     '''
-    Get all the bishop moves for the bishop located at (row, col) and add them to the moves list
+    Get all the knight moves for the knight on square sq and add them to the moves list
     '''
 
-    def getBishopMoves(self, row, col, moves):
-        piecePinned = False
-        pinDirection = ()
-        for i in range(len(self.pins) - 1, -1, -1):
-            if self.pins[i][0] == row and self.pins[i][1] == col:
-                piecePinned = True
-                pinDirection = (self.pins[i][2], self.pins[i][3])
-                self.pins.remove(self.pins[i])
-                break
+    def getKnightMoves(self, sq, moves):
+        if self.pinned & (1 << sq):  # a pinned knight can never stay on the pin line
+            return
+        allyOcc = self.occW if self.whiteToMove else self.occB
+        pieceAt = self.pieceAt
+        moveBits = sq | (pieceAt[sq] << 12)
+
+        attacks = KNIGHT_ATTACKS[sq] & ~allyOcc & self.targetMask
+        append = moves.append
+        while attacks:  # empty space or enemy piece
+            endBit = attacks & -attacks
+            attacks ^= endBit
+            endSq = endBit.bit_length() - 1
+            append(moveBits | (endSq << 6) | (pieceAt[endSq] << 16))
 
-        directions = ((-1, -1), (1, -1), (-1, 1), (1, 1))
-        enemyColor = 'b' if self.whiteToMove else 'w'
-
-        for d in directions:
-            for i in range(1, 8):
-                endRow = row + d[0] * i
-                endCol = col + d[1] * i
-
-                if 0 <= endRow < 8 and 0 <= endCol < 8:
-                    if not piecePinned or pinDirection == d or pinDirection == (-d[0], -d[1]):
-                        endPiece = self.board[endRow][endCol]
-                        if endPiece == '--':  # empty space
-                            moves.append(
-                                Move((row, col), (endRow, endCol), self.board))
-                        elif endPiece[0] == enemyColor:  # enemy piece
-                            moves.append(
-                                Move((row, col), (endRow, endCol), self.board))
-                            break
-                        else:  # friendly piece
-                            break
-                else:  # off board
-                    break
+    '''
+    Get all the bishop moves for the bishop on square sq and add them to the moves list
+    '''
+
+    def getBishopMoves(self, sq, moves):
+        self.addSliderMoves(sq, bishopAttacks(sq, self.occ), moves)
 
     '''
-    Get all the queen moves for the queen located at (row, col) and add them to the moves list
+    Get all the queen moves for the queen on square sq and add them to the moves list
     '''
 
-    def getQueenMoves(self, row, col, moves):
-        self.getBishopMoves(row, col, moves)
-        self.getRookMoves(row, col, moves)
+    def getQueenMoves(self, sq, moves):
+        occ = self.occ
+        self.addSliderMoves(sq, rookAttacks(sq, occ) | bishopAttacks(sq, occ), moves)
 
     '''
-    Get all the king moves for the king located at (row, col) and add them to the moves list
+    Get all the king moves for the king on square sq and add them to the moves list
     '''
 
-    def getKingMoves(self, row, col, moves):
-        rowMoves = (-1, -1, -1, 0, 0, 1, 1, 1)
-        colMoves = (-1, 0, 1, -1, 1, -1, 0, 1)
-        allyColor = 'w' if self.whiteToMove else 'b'
+    def getKingMoves(self, sq, moves):
+        allyOcc = self.occW if self.whiteToMove else self.occB
+        pieceAt = self.pieceAt
+        moveBits = sq | (pieceAt[sq] << 12)
 
-        for i in range(8):
-            endRow = row + rowMoves[i]
-            endCol = col + colMoves[i]
-            if 0 <= endRow < 8 and 0 <= endCol < 8:
-                endPiece = self.board[endRow][endCol]
-                if endPiece[0] != allyColor:  # not an ally
-                    # place king on end square and check for checks
-                    if allyColor == 'w':
-                        self.whiteKingLocation = (endRow, endCol)
-                    else:
-                        self.blackKingLocation = (endRow, endCol)
-                    inCheck, pins, checks = self.checkForPinsAndChecks()
-                    if not inCheck:
-                        moves.append(
-                            Move((row, col), (endRow, endCol), self.board))
-                    # place back king at original location
-                    if allyColor == 'w':
-                        self.whiteKingLocation = (row, col)
-                    else:
-                        self.blackKingLocation = (row, col)
+        # the king is taken off the board so that a square behind it on a checking ray is still seen as attacked
+        attacked = self.getEnemyAttacks(self.occ ^ (1 << sq))
+        attacks = KING_ATTACKS[sq] & ~allyOcc & ~attacked
+        append = moves.append
+        while attacks:  # not an ally and not attacked
+            endBit = attacks & -attacks
+            attacks ^= endBit
+            endSq = endBit.bit_length() - 1
+            append(moveBits | (endSq << 6) | (pieceAt[endSq] << 16))
+
+
+ROW_TO_RANK = ('8', '7', '6', '5', '4', '3', '2', '1')  # rank of each board row
+COL_TO_FILE = ('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h')  # file of each board column
 
 
 class Move():
-    ranksToRows = {rank: row for rank, row in zip(
-        [str(i) for i in range(1, 9)], range(7, -1, -1))}  # {'1': 7, ... , '8': 0}
-    rowsToRanks = {row: rank for rank, row in ranksToRows.items()}
-    aToH = list(map(chr, range(97, 105)))
-    filesToCols = {file: col for file, col in zip(
-        aToH, range(0, 8))}  # {'a': 0, ... , 'h': 7}
-    colsToFiles = {col: file for file, col in filesToCols.items()}
+    # the packed move is the only state, the squares and pieces are decoded from it when asked for
+    __slots__ = ('moveID',)
 
     def __init__(self, startSq, endSq, board):
-        self.startRow = startSq[0]
-        self.startCol = startSq[1]
-        self.endRow = endSq[0]
-        self.endCol = endSq[1]
-        self.pieceMoved = board[self.startRow][self.startCol]
-        self.pieceCaptured = board[self.endRow][self.endCol]
-        self.moveID = self.startRow * 1000 + self.startCol * 100 + self.endRow * \
-            10 + self.endCol  # encapsulating all relevant 4 numbers into an ID
+        self.reset(startSq, endSq, board)
 
     '''
-    Overriding the equals method so that comparing two moves doesn't compare the Move objects
+    Re-initializes the Move in place, so one instance can be reused instead of allocating a new one per move
     '''
 
-    def __eq__(self, other):
-        if isinstance(other, Move):
-            return self.moveID == other.moveID
-        return False
+    def reset(self, startSq, endSq, board):
+        startRow, startCol = startSq
+        endRow, endCol = endSq
+        # the packed move the move generators produce for the same move
+        self.moveID = packMove(startRow * 8 + startCol, endRow * 8 + endCol,
+                               PIECE_CODES[board[startRow][startCol]], PIECE_CODES[board[endRow][endCol]])
+
+    @property
+    def startRow(self):
+        return (self.moveID & 63) >> 3
+
+    @property
+    def startCol(self):
+        return self.moveID & 7
+
+    @property
+    def endRow(self):
+        return ((self.moveID >> 6) & 63) >> 3
+
+    @property
+    def endCol(self):
+        return (self.moveID >> 6) & 7
+
+    @property
+    def pieceMoved(self):
+        return PIECE_NAMES[(self.moveID >> 12) & 15]
+
+    @property
+    def pieceCaptured(self):
+        return PIECE_NAMES[(self.moveID >> 16) & 15]
 
     def getChessNotation(self):
         return self.getRankFile(self.startRow, self.startCol) + self.getRankFile(self.endRow, self.endCol)
 
     def getRankFile(self, r, c):
-        return self.colsToFiles[c] + self.rowsToRanks[r]
+        return COL_TO_FILE[c] + ROW_TO_RANK[r]
@@ -10,9 +10,13 @@ DIMENSION = 8
 SQ_SIZE = HEIGHT // DIMENSION
 MAX_FPS = 15
 IMAGES = {}
+BOARD_SURFACE = None  # the empty checkered board, rendered once by loadBoard
+SQ_RECTS = [[p.Rect(c*SQ_SIZE, r*SQ_SIZE, SQ_SIZE, SQ_SIZE) for c in range(DIMENSION)]
+            for r in range(DIMENSION)]  # screen area of each square, indexed [row][col]
 
 '''
-Initialize a global dictionary of images. This will be called exactly once in the main
+Initialize a global dictionary of images. This will be called exactly once in the main, after the display is set up
+The images are converted to the display's pixel format so blitting them needs no per-pixel conversion
 '''
 
 
@@ -21,7 +25,23 @@ def loadImages():
               "bP", "wR", "wN", "wB", "wQ", "wK", "wP"]
     for piece in pieces:
         IMAGES[piece] = p.transform.scale(p.image.load(
-            'images/' + piece + '.png'), (SQ_SIZE, SQ_SIZE))
+            'images/' + piece + '.png'), (SQ_SIZE, SQ_SIZE)).convert_alpha()
+
+
+'''
+Render the squares of the board once into BOARD_SURFACE, so drawing the board is a single blit
+'''
+
+
+def loadBoard():
+    global BOARD_SURFACE
+    BOARD_SURFACE = p.Surface((WIDTH, HEIGHT)).convert()
+    colors = [p.Color('white'), p.Color('gray')]
+    for r in range(DIMENSION):
+        for c in range(DIMENSION):
+            # light squares have even parity, black squares have odd parity
+            color = colors[(r + c) % 2]
+            p.draw.rect(BOARD_SURFACE, color, SQ_RECTS[r][c])
 
 
 '''
@@ -35,18 +55,31 @@ def main():
     clock = p.time.Clock()
     screen.fill(p.Color('white'))
     gs = ChessEngine.GameState()
-    validMoves = gs.getValidMoves()
+    validMoves = set(gs.getValidMoves())  # packed moves, a set so each click is a single hash lookup
+    validMovesLog = []  # valid moves before each move in gs.moveLog, so an undo can restore them without regenerating
     # flag to ensure we only call getValidMoves() when it is needed as it is expensive
     validMoveMade = False
     loadImages()  # only once (expensive)
+    loadBoard()
     running = True
     sqSelected = ()  # keep track of the last click of the user: tuple (row, col)
     playerClicks = []  # keep track of last two  player clicks: two tuples
+    # move built from the last two clicks, reset in place on every attempt instead of allocating a new one
+    move = ChessEngine.Move((0, 0), (0, 0), gs.board)
+    dirty = True  # the screen is out of date and has to be redrawn
 
     while running:
-        for e in p.event.get():
+        if dirty:
+            drawGameState(screen, gs)
+            clock.tick(MAX_FPS)
+            p.display.flip()
+            dirty = False
+        # nothing changes on screen without an event, so sleep until one arrives instead of redrawing every frame
+        for e in [p.event.wait()] + p.event.get():
             if e.type == p.QUIT:
                 running = False
+            elif e.type in (p.VIDEOEXPOSE, p.WINDOWEXPOSED):  # window uncovered or restored
+                dirty = True
             # mouse handler
             elif e.type == p.MOUSEBUTTONDOWN:  # moving the pieces
                 location = p.mouse.get_pos()
@@ -60,11 +93,12 @@ def main():
                     sqSelected = (r, c)
                     playerClicks.append(sqSelected)
                 if len(playerClicks) == 2:
-                    move = ChessEngine.Move(
-                        playerClicks[0], playerClicks[1], gs.board)
-                    if move in validMoves:
-                        gs.makeMove(move)
+                    move.reset(playerClicks[0], playerClicks[1], gs.board)
+                    if move.moveID in validMoves:
+                        validMovesLog.append(validMoves)
+                        gs.makeMove(move.moveID)
                         validMoveMade = True
+                        dirty = True
                         print(move.getChessNotation())
                         sqSelected = ()  # reset user clicks
                         playerClicks = []
@@ -73,22 +107,19 @@ def main():
                         playerClicks = [sqSelected]
             # key handlers
             elif e.type == p.KEYDOWN:
-                if e.key == p.K_z:  # undo move if z is pressed
+                if e.key == p.K_z and validMovesLog:  # undo move if z is pressed
                     gs.undoMove()
-                    validMoveMade = True
+                    validMoves = validMovesLog.pop()
+                    dirty = True
 
         if validMoveMade:
-            validMoves = gs.getValidMoves()  # get next set of valid moves
+            validMoves = set(gs.getValidMoves())  # get next set of valid moves
             validMoveMade = False
 
-        drawGameState(screen, gs)
-        clock.tick(MAX_FPS)
-        p.display.flip()
-
 
 def drawGameState(screen, gs):
     drawBoard(screen)
-    drawPieces(screen, gs.board)
+    drawPieces(screen, gs.pieceAt)
 
 
 '''
@@ -97,27 +128,18 @@ Draw the squares on the board
 
 
 def drawBoard(screen):
-    colors = [p.Color('white'), p.Color('gray')]
-    for r in range(DIMENSION):
-        for c in range(DIMENSION):
-            # light squares have even parity, black squares have odd parity
-            color = colors[(r + c) % 2]
-            p.draw.rect(screen, color, p.Rect(
-                c*SQ_SIZE, r*SQ_SIZE, SQ_SIZE, SQ_SIZE))
+    screen.blit(BOARD_SURFACE, (0, 0))
 
 
 '''
-Draw the pieces on the board using the current GameState.board
+Draw the pieces on the board using the current GameState.pieceAt, the piece code on each square
 '''
 
 
-def drawPieces(screen, board):
-    for r in range(DIMENSION):
-        for c in range(DIMENSION):
-            piece = board[r][c]
-            if piece != '--':
-                screen.blit(IMAGES[piece], p.Rect(
-                    c*SQ_SIZE, r*SQ_SIZE, SQ_SIZE, SQ_SIZE))
+def drawPieces(screen, pieceAt):
+    for sq, code in enumerate(pieceAt):
+        if code != ChessEngine.EMPTY:
+            screen.blit(IMAGES[ChessEngine.PIECE_NAMES[code]], SQ_RECTS[sq // DIMENSION][sq % DIMENSION])
 
 
 if __name__ == '__main__':